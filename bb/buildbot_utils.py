@@ -24,8 +24,10 @@ Module contains buildbot specific functions
 
 import time
 from enum import Enum
+from operator import itemgetter
 from collections import defaultdict
 
+import sqlalchemy as sa
 from buildbot.plugins import util
 from twisted.internet import defer
 
@@ -70,14 +72,80 @@ class BuildStatus(Enum):
         return icons.get(self, '\u2753')
 
 
+@defer.inlineCallbacks
+def get_builds_for_requests(request_ids, master):
+    """
+    Gets builds of several build requests with one query to DB
+    (master.db.builds.getBuilds makes query per build request)
+
+    :param request_ids: list of int
+    :param master: BuildMaster object from buildbot.master
+    :return: dict
+        Example: {buildrequest_id: [{'id': int, 'started_at': int, 'results': int or None}, ...]}
+    """
+    builds_table = master.db.model.builds
+
+    def thd(conn):
+        query = sa.select([builds_table.c.id, builds_table.c.buildrequestid,
+                           builds_table.c.started_at, builds_table.c.results]).where(
+            builds_table.c.buildrequestid.in_(request_ids))
+        builds = defaultdict(list)
+        for row in conn.execute(query):
+            builds[row.buildrequestid].append({'id': row.id,
+                                               'started_at': row.started_at,
+                                               'results': row.results})
+        return builds
+
+    if not request_ids:
+        return {}
+    builds_for_requests = yield master.db.pool.do(thd)
+    defer.returnValue(builds_for_requests)
+
+
+@defer.inlineCallbacks
+def get_last_build_info(request_id, builds_for_request, master):
+    """
+    Gets status of the latest build for build request
+
+    :param request_id: str
+    :param builds_for_request: list of build dicts (see get_builds_for_requests)
+    :param master: BuildMaster object from buildbot.master
+    :return: dict (see get_triggered_builds)
+    """
+    if not builds_for_request:
+        return {'buildrequest_id': request_id,
+                'result': BuildStatus.NOT_STARTED,
+                'build_id': None}
+
+    # It is sorted to get the latest started build, because Buildbot's list of builds is not ordered
+    last_build = max(builds_for_request, key=itemgetter('started_at'))
+    last_build_status = BuildStatus(last_build['results'])
+    build_info = {'buildrequest_id': request_id,
+                  'result': last_build_status,
+                  'build_id': last_build['id']}
+
+    # Add current step information if build ongoing
+    if last_build_status == BuildStatus.RUNNING:
+        last_build_steps = yield master.db.steps.getSteps(buildid=last_build['id'])
+        if last_build_steps:
+            current_step_of_last_build = last_build_steps[-1]
+            build_info['step_name'] = current_step_of_last_build['name']
+            build_info['step_started_at'] = current_step_of_last_build['started_at']
+        else:
+            build_info['step_name'] = None
+            build_info['step_started_at'] = None
+    defer.returnValue(build_info)
+
+
 @defer.inlineCallbacks
 def get_triggered_builds(build_id, master):
     """
-    Recursively gets all triggered builds to identify current status of pipeline
+    Gets all triggered builds to identify current status of pipeline
+    Builds are walked level by level, requests of one level are performed together
 
     :param build_id: int
     :param master: BuildMaster object from buildbot.master
-    :return: defaultdict
+    :return: dict
         Example: {'builder_name': {'buildrequest_id': str,
                                    'result': BuildStatus,
                                    'build_id': None or int,
@@ -87,43 +155,28 @@ def get_triggered_builds(build_id, master):
                                    'step_started_at': Datetime or None},
                   ....}
     """
-    triggered_builds = defaultdict(dict)
-    parent_build_trigger_step = yield master.db.steps.getStep(
-        buildid=build_id,
-        name='trigger')
-    if parent_build_trigger_step is None:
-        return triggered_builds
-
-    requests = parent_build_trigger_step.get('urls')
-    for request in requests:
-        builder_name, request_id = request['name'].split(' #')
-        triggered_builds[builder_name]['buildrequest_id'] = request_id
-        builds_for_request = yield master.db.builds.getBuilds(buildrequestid=request_id)
-        if builds_for_request:
-            # It is sorted to get the latest started build, because Buildbot's list of builds is not ordered
-            last_build = max(builds_for_request, key=lambda r: r['started_at'])
-
-            last_build_status = BuildStatus(last_build['results'])
-            triggered_builds[builder_name]['result'] = last_build_status
-            triggered_builds[builder_name]['build_id'] = last_build['id']
-
-            # Add current step information if build ongoing
-            if last_build_status == BuildStatus.RUNNING:
-                last_build_steps = yield master.db.steps.getSteps(buildid=last_build['id'])
-                if last_build_steps:
-                    current_step_of_last_build = last_build_steps[-1]
-                    triggered_builds[builder_name]['step_name'] = current_step_of_last_build['name']
-                    triggered_builds[builder_name]['step_started_at'] = current_step_of_last_build['started_at']
-                else:
-                    triggered_builds[builder_name]['step_name'] = None
-                    triggered_builds[builder_name]['step_started_at'] = None
-
-            new_builds = yield get_triggered_builds(last_build['id'], master)
-            triggered_builds.update(new_builds)
-
-        else:
-            triggered_builds[builder_name]['result'] = BuildStatus.NOT_STARTED
-            triggered_builds[builder_name]['build_id'] = None
+    triggered_builds = {}
+    build_ids = [build_id]
+    while build_ids:
+        trigger_steps = yield defer.gatherResults(
+            [master.db.steps.getStep(buildid=id_, name='trigger') for id_ in build_ids],
+            consumeErrors=True)
+
+        requests = [request['name'].split(' #')
+                    for trigger_step in trigger_steps if trigger_step is not None
+                    for request in trigger_step.get('urls')]
+        builds_for_requests = yield get_builds_for_requests(
+            [int(request_id) for _, request_id in requests], master)
+        builds_info = yield defer.gatherResults(
+            [get_last_build_info(request_id, builds_for_requests.get(int(request_id)), master)
+             for _, request_id in requests],
+            consumeErrors=True)
+
+        build_ids = []
+        for (builder_name, _), build_info in zip(requests, builds_info):
+            triggered_builds[builder_name] = build_info
+            if build_info['build_id'] is not None:
+                build_ids.append(build_info['build_id'])
 
     defer.returnValue(triggered_builds)
 
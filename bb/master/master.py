@@ -18,13 +18,16 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import os
 import sys
-import pathlib
 
 from buildbot.changes.gitpoller import GitPoller
 from buildbot.plugins import schedulers, util, worker, reporters
 
-sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+# Config is re-imported on every reconfig, so add root of repository to the path only once
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if REPOSITORY_ROOT not in sys.path:
+    sys.path.append(REPOSITORY_ROOT)
 import bb.master.config as config
 
 import bb.utils
@@ -33,10 +36,8 @@ c = BuildmasterConfig = {}
 
 # Add workers
 c["workers"] = []
-ALL_WORKERS_NAMES = []
 for worker_ in config.WORKERS.values():
     for w_name, prop in worker_.items():
-        ALL_WORKERS_NAMES.append(w_name)
         c["workers"].append(worker.Worker(w_name, config.WORKER_PASS,
                                           properties=prop,
                                           # To disable parallel builds on one worker
@@ -50,10 +51,10 @@ c["titleURL"] = config.REPO_URL
 c["buildbotURL"] = config.BUILDBOT_URL
 
 
-def get_workers(worker_pool):
-    if worker_pool is None:
-        return ALL_WORKERS_NAMES
-    return list(config.WORKERS[worker_pool].keys())
+ALL_WORKERS_NAMES = tuple(w_name for worker_ in config.WORKERS.values() for w_name in worker_)
+# Builders without "worker" property can be run on any worker
+WORKERS_NAMES_BY_POOL = {None: ALL_WORKERS_NAMES,
+                         **{pool: tuple(workers) for pool, workers in config.WORKERS.items()}}
 
 
 # Create schedulers and builders for builds
@@ -69,7 +70,8 @@ for builder_name, properties in config.FLOW.get_prepared_builders().items():
         c["schedulers"].append(schedulers.Triggerable(name=builder_name,
                                                       builderNames=[builder_name]))
     c["builders"].append(util.BuilderConfig(name=builder_name,
-                                            workernames=get_workers(properties.get("worker")),
+                                            # BuilderConfig accepts list of worker names only
+                                            workernames=list(WORKERS_NAMES_BY_POOL[properties.get("worker")]),
                                             factory=properties['factory']))
 
 
@@ -77,13 +79,14 @@ class GitHubStatusPushFilter(reporters.GitHubStatusPush):
     """
     This class extend filtering options for reporters.GitHubStatusPush
     """
+    # Status for these repositories will not sent to not affect review requests in these repositories
+    # TODO: remove workaround for libva notifications
+    SILENT_REPOSITORIES = frozenset(config.AUTO_UPDATED_REPOSITORIES + [config.LIBVA_REPO])
+
     def filterBuilds(self, build):
         # All builds have basic 'repository' property
         repository = bb.utils.get_repository_name_by_url(build['properties']['repository'][0])
-        # Status for AUTO_UPDATED_REPOSITORIES will not sent to not affect review requests
-        # in these repositories
-        # TODO: remove workaround for libva notifications
-        if repository not in config.AUTO_UPDATED_REPOSITORIES and repository != config.LIBVA_REPO:
+        if repository not in self.SILENT_REPOSITORIES:
             if self.builders is not None:
                 return build['builder']['name'] in self.builders
             return True
@@ -23,15 +23,27 @@ Module contains shared functions for buildbot configurations
 This module doesn't require buildbot installed
 """
 
-import ssl
+import os
+import re
 import json
+import time
 import pathlib
-import urllib.request
+import functools
+import threading
 
 from enum import Enum
+
+import requests
+from requests.adapters import HTTPAdapter
+try:
+    # orjson is optional, it parses Github responses faster and accepts bytes directly
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 from twisted.internet import defer
 
-from common.mediasdk_directories import MediaSdkDirectories, OsType
+from common.mediasdk_directories import MediaSdkDirectories, OsType, \
+    OPEN_SOURCE_RELEASE_BRANCH_PATTERN
 
 
 class CIService(Enum):
@@ -50,57 +62,165 @@ PACKAGES = 'packages'
 MAX_NUM_COMMITS = 20
 MAX_NUM_COMMITS_RELEASE_BRANCH = 10
 
+# Authors of pull requests with these associations with repository can run builds
+# without checking of membership in organization
+TRUSTED_AUTHOR_ASSOCIATIONS = frozenset(['OWNER', 'MEMBER', 'COLLABORATOR'])
+
+# Authors of pull requests with these associations with repository are members of organization
+MEMBER_AUTHOR_ASSOCIATIONS = frozenset(['OWNER', 'MEMBER'])
+
+# Matches 'refs/heads/master' and 'refs/heads/<release branch>' in one pass
+# Pull request branches like 'refs/pull/*' are ignored
+RELEASE_BRANCH_REF_RE = re.compile(
+    r'^refs/heads/(?:master$|' +
+    '|'.join(pattern.lstrip('^') for pattern in OPEN_SOURCE_RELEASE_BRANCH_PATTERN) + ')')
+
+# Gets pull request id from 'refs/pull/<id>/head' branch
+PULL_REQUEST_BRANCH_RE = re.compile(r'^refs/pull/(\d+)/head$')
+
+# Gets organization and repository from 'https://github.com/<organization>/<repository>.git'
+GITHUB_REPOSITORY_URL_RE = re.compile(r'([^/]+)/([^/]+?)(?:\.git)?$')
+
+# Lifetime of cached GitHub lookups (in seconds)
+# Bursts of changes for the same pull request are processed during one poll, so they share lookups
+GITHUB_CACHE_TTL = 60
+
+# Lifetime of ETags of Github responses for conditional requests (in seconds)
+ETAG_CACHE_TTL = 60 * 60
+
+# Pull requests are cached on disk to survive restarts of buildbot
+PULL_REQUEST_CACHE_DIR = pathlib.Path(
+    os.environ.get('XDG_CACHE_HOME', pathlib.Path.home() / '.cache')) / 'mediasdk-bb'
+MERGED_PULL_REQUEST_CACHE_TTL = 30 * 24 * 60 * 60
+
+# Timeout of requests to Github (in seconds)
+REQUEST_TIMEOUT = 30
+
+# Maximum page size of Github API (default is 30)
+ITEMS_PER_PAGE = 100
+
+GITHUB_GRAPHQL_URL = 'https://api.github.com/graphql'
+
+# Gets all information needed by ChangeChecker for pull request in one request
+PULL_REQUEST_QUERY = """
+query($organization: String!, $repository: String!, $pull_id: Int!) {
+  repository(owner: $organization, name: $repository) {
+    owner { login }
+    pullRequest(number: $pull_id) {
+      number
+      state
+      mergedAt
+      authorAssociation
+      baseRefName
+      headRefOid
+      commits { totalCount }
+      author {
+        login
+        ... on User { organization(login: $organization) { login } }
+      }
+    }
+  }
+}
+"""
+
 
 class Mode(Enum):
     PRODUCTION_MODE = "production_mode"
     TEST_MODE = "test_mode"
 
 
+class TTLCache:
+    """
+    Thread safe in-memory cache which entries expire after ttl seconds
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expire_time, value = item
+            if expire_time < time.monotonic():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            now = time.monotonic()
+            # Drop expired entries to keep the cache small
+            for expired_key in [k for k, (expire_time, _) in self._data.items()
+                                if expire_time < now]:
+                del self._data[expired_key]
+            self._data[key] = (now + self.ttl, value)
+
+
+GITHUB_CACHE = TTLCache(GITHUB_CACHE_TTL)
+ETAG_CACHE = TTLCache(ETAG_CACHE_TTL)
+
+# Shared session keeps connections to Github alive between requests
+# Certificates are verified with CA bundle loaded once for the session
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+SESSION.headers.update({'Accept': 'application/vnd.github.v3+json'})
+
+
+@functools.lru_cache(maxsize=4096)
+def _get_windows_path(path):
+    return str(pathlib.PureWindowsPath(path))
+
+
+@functools.lru_cache(maxsize=4096)
+def _get_posix_path(path):
+    return str(pathlib.PurePosixPath(path))
+
+
 def get_path_on_os(os):
     """
     Convert path for specified os
     Implemented as closure to improve usability
+    Converted paths are cached, because the same paths are used in every build
     """
 
-    def get_path(path):
-        if os == OsType.windows:
-            return str(pathlib.PureWindowsPath(path))
-        elif os == OsType.linux:
-            return str(pathlib.PurePosixPath(path))
-        raise OSError(f'Unknown os type {os}')
-
-    return get_path
+    if os == OsType.windows:
+        return _get_windows_path
+    elif os == OsType.linux:
+        return _get_posix_path
+    raise OSError(f'Unknown os type {os}')
 
 
 @defer.inlineCallbacks
 def get_root_build_id(build_id, master):
     """
-    Recursively gets ids of parent builds to find root builder (trigger) id
+    Gets ids of parent builds one by one to find root builder (trigger) id
 
     :param build_id: int
     :param master: BuildMaster object from buildbot.master
     :return: int
     """
-    build = yield master.data.get(('builds', build_id))
-    buildrequest_id = build['buildrequestid']
-    buildrequest = yield master.data.get(('buildrequests', buildrequest_id))
-    buildset_id = buildrequest['buildsetid']
-    buildset = yield master.data.get(('buildsets', buildset_id))
-    parent_build_id = buildset['parent_buildid']
-    if parent_build_id is not None:
-        build_id = yield get_root_build_id(parent_build_id, master)
-    defer.returnValue(build_id)
+    while True:
+        build = yield master.data.get(('builds', build_id))
+        buildrequest_id = build['buildrequestid']
+        buildrequest = yield master.data.get(('buildrequests', buildrequest_id))
+        buildset_id = buildrequest['buildsetid']
+        buildset = yield master.data.get(('buildsets', buildset_id))
+        parent_build_id = buildset['parent_buildid']
+        if parent_build_id is None:
+            defer.returnValue(build_id)
+        build_id = parent_build_id
 
 
 def is_limited_number_of_commits(pull_request, token=None):
     """
     Checks if number of commits does not exceed the specified value
+    Number of commits is taken from pull request json, so token is not needed anymore
     """
-    github_commits_url = pull_request['commits_url']
-
-    data = get_data(github_commits_url,
-                    additional_headers={'Authorization': f'token {token}'} if token else None)
-    number_of_commits = len(data)
+    number_of_commits = pull_request['commits']
     branch = pull_request['base']['ref']
     if number_of_commits > MAX_NUM_COMMITS:
         return False
@@ -117,72 +237,303 @@ def is_comitter_the_org_member(pull_request, token=None):
 
     commit_owner = pull_request['user']['login']
     organization = pull_request['base']['repo']['owner']['login']
+    # Owner of repository and members of organization are known from pull request json
+    if commit_owner == organization:
+        print(f'Check organization member: user {commit_owner} is owner of {organization}')
+        return True
+    author_association = pull_request.get('author_association')
+    if author_association in MEMBER_AUTHOR_ASSOCIATIONS:
+        print(f'Check organization member: user {commit_owner} is {author_association} '
+              f'of {organization}')
+        return True
+
+    cache_key = ('member', organization, commit_owner)
+    result = GITHUB_CACHE.get(cache_key)
+    if result is None:
+        result = _is_comitter_the_org_member(organization, commit_owner, token)
+        GITHUB_CACHE.set(cache_key, result)
+    return result
+
+
+def _is_comitter_the_org_member(organization, commit_owner, token=None):
     github_member_url = f"https://api.github.com/orgs/{organization}/members/{commit_owner}"
-    if token:
-        github_member_url += f"?access_token={token}"
 
     try:
-        response = urllib.request.urlopen(github_member_url,
-                                          context=ssl._create_unverified_context())
+        response = SESSION.get(github_member_url,
+                               headers={'Authorization': f'token {token}'} if token else None,
+                               timeout=REQUEST_TIMEOUT)
     except Exception as error:
         print(f"Check organization member: Exception occurred "
               f"while checking user {commit_owner} in {organization} organization: {error}")
         return False
 
-    if response.code == 204:
+    if response.status_code == 204:
         print(f'Check organization member: user {commit_owner} was found in {organization}')
         return True
     print(f"Check organization member: user {commit_owner} was "
-          f"not found in {organization} organization. Code: {response.code}")
+          f"not found in {organization} organization. Code: {response.status_code}")
     return False
 
 
-def get_data(url, proxy=None, additional_headers=None):
+def get_data(url, proxy=None, additional_headers=None, no_cache=False):
     """
     Wrapper for GET request
+    Responses are cached for GITHUB_CACHE_TTL seconds, so returned data must not be modified
+
+    :param no_cache: if True, request is performed even if response is cached
     """
     request = {'url': url, 'method': 'GET',
                'headers': {'Content-type': 'application/json; charset=UTF-8'}}
     if additional_headers:
         request['headers'].update(additional_headers)
-    req = urllib.request.Request(**request)
-    if proxy:
-        req.set_proxy(proxy, 'http')
+
+    cache_key = ('get', url, frozenset(request['headers'].items()))
+    if not no_cache:
+        data = GITHUB_CACHE.get(cache_key)
+        if data is not None:
+            return data
+
+    # Conditional request: Github answers 304 without body if data was not changed
+    # (such responses are not counted in rate limit)
+    headers = request['headers']
+    etag, etag_data = ETAG_CACHE.get(cache_key, (None, None))
+    if etag:
+        headers = {**headers, 'If-None-Match': etag}
+
     try:
-        response = urllib.request.urlopen(req, context=ssl._create_unverified_context())
-        data = json.loads(response.read().decode('utf8'))
+        response = SESSION.get(url, headers=headers,
+                               proxies={'http': proxy, 'https': proxy} if proxy else None,
+                               timeout=REQUEST_TIMEOUT)
+        if response.status_code == 304:
+            data = etag_data
+        else:
+            response.raise_for_status()
+            data = json_loads(response.content)
+            if response.headers.get('ETag'):
+                ETAG_CACHE.set(cache_key, (response.headers['ETag'], data))
     except Exception as error:
         print(f'Can not get info from {url}')
         print(f'Request json: {request}')
         print(f'Http proxy: {proxy}')
         print(f'ERROR: {error}')
         return None
+    GITHUB_CACHE.set(cache_key, data)
+    return data
+
+
+def get_paginated_data(url, proxy=None, additional_headers=None):
+    """
+    Wrapper for GET request of list which Github returns by pages
+
+    :return None or list of items from all pages
+    """
+    items = []
+    page = 1
+    while True:
+        data = get_data(f'{url}{"&" if "?" in url else "?"}per_page={ITEMS_PER_PAGE}&page={page}',
+                        proxy=proxy, additional_headers=additional_headers)
+        if data is None:
+            return None
+        items += data
+        if len(data) < ITEMS_PER_PAGE:
+            return items
+        page += 1
+
+
+def get_graphql(query, variables, token, proxy=None):
+    """
+    Wrapper for request to Github GraphQL API
+    Token is required by GraphQL API
+    Failures are cached for GITHUB_CACHE_TTL seconds (for example, if token has no GraphQL scope),
+    so callers fall back to REST API without repeating failed requests
+
+    :return None or dict with requested data
+    """
+    failure_cache_key = ('graphql_failure', token)
+    if GITHUB_CACHE.get(failure_cache_key):
+        return None
+
+    try:
+        response = SESSION.post(GITHUB_GRAPHQL_URL,
+                                json={'query': query, 'variables': variables},
+                                headers={'Authorization': f'bearer {token}'},
+                                proxies={'http': proxy, 'https': proxy} if proxy else None,
+                                timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        result = json_loads(response.content)
+        error = result.get('errors')
+    except Exception as request_error:
+        error = request_error
+
+    if error:
+        print(f'Can not get info from {GITHUB_GRAPHQL_URL}')
+        print(f'Variables: {variables}')
+        print(f'ERROR: {error}')
+        GITHUB_CACHE.set(failure_cache_key, True)
+        return None
+    return result.get('data')
+
+
+def disk_cache_get(path):
+    """
+    Gets data saved by disk_cache_put
+
+    :param path: pathlib.Path to cache file
+    :return None if data is not cached, expired or cache file is broken
+    """
+    try:
+        with path.open() as cache_file:
+            item = json_loads(cache_file.read())
+        expire_time, data = item['expire_time'], item['data']
+        if expire_time < time.time():
+            # Expired files are removed to not accumulate them in cache directory
+            path.unlink()
+            return None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
     return data
 
 
-def get_pull_request_info(organization, repository, pull_id=None, token=None, proxy=None):
+def disk_cache_put(path, data, ttl):
+    """
+    Saves json serializable data to cache file, the file is replaced atomically
+
+    :param path: pathlib.Path to cache file
+    :param ttl: lifetime of data (in seconds)
+    """
+    temp_path = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path.write_text(json.dumps({'expire_time': time.time() + ttl, 'data': data}))
+        os.replace(str(temp_path), str(path))
+    except OSError as error:
+        print(f'Can not save cache file {path}: {error}')
+
+
+def get_pull_request_cache_path(organization, repository, pull_id, api):
+    return PULL_REQUEST_CACHE_DIR / f'{organization}-{repository}' / f'{pull_id}.{api}.json'
+
+
+def save_pull_request_to_disk_cache(path, pull_request):
+    """
+    Merged pull requests are not changed, so they are cached for a long time
+    Closed pull requests are not, because they can be reopened and get new commits
+    """
+    ttl = MERGED_PULL_REQUEST_CACHE_TTL if pull_request.get('merged_at') is not None \
+        else GITHUB_CACHE_TTL
+    disk_cache_put(path, pull_request, ttl)
+
+
+def get_short_pull_request(pull_request):
+    """
+    Leaves only fields of REST API pull request json which are described in ChangeChecker,
+    so change filters get the same dict from REST and GraphQL APIs
+    """
+    return {
+        'number': pull_request['number'],
+        'state': pull_request['state'],
+        'merged_at': pull_request['merged_at'],
+        'user': {'login': pull_request['user']['login']},
+        'author_association': pull_request['author_association'],
+        'commits': pull_request['commits'],
+        'head': {'sha': pull_request['head']['sha']},
+        'base': {'ref': pull_request['base']['ref'],
+                 'repo': {'owner': {'login': pull_request['base']['repo']['owner']['login']}}}}
+
+
+def get_pull_request_info_graphql(organization, repository, pull_id, token, proxy=None,
+                                  refresh=False):
+    """
+    Gets pull request and membership of its author in organization by one GraphQL request
+    Membership is saved to cache, so is_comitter_the_org_member does not request Github again
+
+    :param refresh: if True, cached pull request is ignored
+    :return None or pull request dict described in ChangeChecker
+    """
+
+    cache_key = ('pull_request', organization, repository, pull_id)
+    cache_path = get_pull_request_cache_path(organization, repository, pull_id, 'graphql')
+    if not refresh:
+        pull_request = GITHUB_CACHE.get(cache_key) or disk_cache_get(cache_path)
+        if pull_request is not None:
+            return pull_request
+
+    data = get_graphql(PULL_REQUEST_QUERY,
+                       {'organization': organization, 'repository': repository,
+                        'pull_id': int(pull_id)},
+                       token, proxy=proxy)
+    if not data or not data['repository'] or not data['repository']['pullRequest']:
+        return None
+
+    owner = data['repository']['owner']['login']
+    graphql_pull_request = data['repository']['pullRequest']
+    # Author of pull request is None for deleted accounts
+    author = graphql_pull_request['author'] or {'login': 'ghost'}
+    pull_request = {
+        'number': graphql_pull_request['number'],
+        # REST API has 'open' and 'closed' states only, merged pull requests are
+        # distinguished from closed ones by merged_at
+        'state': 'open' if graphql_pull_request['state'] == 'OPEN' else 'closed',
+        'merged_at': graphql_pull_request['mergedAt'],
+        'user': {'login': author['login']},
+        'author_association': graphql_pull_request['authorAssociation'],
+        'commits': graphql_pull_request['commits']['totalCount'],
+        'head': {'sha': graphql_pull_request['headRefOid']},
+        'base': {'ref': graphql_pull_request['baseRefName'],
+                 'repo': {'owner': {'login': owner}}}}
+    GITHUB_CACHE.set(cache_key, pull_request)
+    save_pull_request_to_disk_cache(cache_path, pull_request)
+
+    # Organization is visible only if the author is a member of it,
+    # otherwise membership is checked via REST API
+    if author.get('organization'):
+        GITHUB_CACHE.set(('member', owner, author['login']), True)
+    return pull_request
+
+
+def get_pull_request_info(organization, repository, pull_id=None, token=None, proxy=None,
+                          refresh=False):
     """
     Gets list of open pull requests. Get one pull request json if pull_id number specified
     Token must be specified for private repositories
 
+    :param refresh: if True, cached pull request is ignored
     :return None or pull request dict or list of pull request dicts
     """
 
     pull_request_url = f'https://api.github.com/repos/{organization}/{repository}/pulls'
+    headers = {'Authorization': f'token {token}'} if token else None
     if pull_id:
-        pull_request_url += f'/{pull_id}'
+        cache_path = get_pull_request_cache_path(organization, repository, pull_id, 'rest')
+        pull_request = None if refresh else disk_cache_get(cache_path)
+        if pull_request is None:
+            pull_request = get_data(f'{pull_request_url}/{pull_id}', proxy=proxy,
+                                    additional_headers=headers, no_cache=refresh)
+            if pull_request:
+                save_pull_request_to_disk_cache(cache_path, pull_request)
+        return pull_request
 
-    return get_data(pull_request_url, proxy=proxy,
-                    additional_headers={'Authorization': f'token {token}'} if token else None)
+    return get_paginated_data(f'{pull_request_url}?state=open', proxy=proxy,
+                              additional_headers=headers)
 
 
 class ChangeChecker:
     """
     This is a change filter for Buildbot masters
+
+    Pull request dict passed to set_pull_request_default_properties and pull_request_filter
+    has only these fields of REST API pull request json (for both REST and GraphQL APIs):
+    number, state, merged_at, user.login, author_association, commits, head.sha, base.ref,
+    base.repo.owner.login
     """
 
-    def __init__(self, token=None):
+    def __init__(self, token=None, ignored_authors=()):
+        """
+        :param ignored_authors: logins of pull request authors (for example, bots)
+                                which changes are skipped before any other checks
+        """
         self.token = token
+        self.ignored_authors = frozenset(ignored_authors)
 
     def set_pull_request_default_properties(self, pull_request, files):
         """
@@ -201,10 +552,18 @@ class ChangeChecker:
         """
         Get pull request json by refs/pull/* branch
         """
-        _, organization, repository = repository[:-4].rsplit('/', maxsplit=2)
-        _, pull_id, _ = branch.rsplit('/', maxsplit=2)
+        organization, repository = get_organization_and_repository_by_url(repository)
+        pull_id = PULL_REQUEST_BRANCH_RE.match(branch).group(1)
         print(f'Processing {pull_id} pull request from {repository}')
-        pull_request = get_pull_request_info(organization, repository, pull_id, self.token)
+        pull_request = None
+        if self.token:
+            pull_request = get_pull_request_info_graphql(organization, repository, pull_id,
+                                                         self.token)
+        if pull_request is None:
+            # Fallback to REST API, GraphQL API can not be used without token
+            pull_request = get_pull_request_info(organization, repository, pull_id, self.token)
+            if pull_request:
+                pull_request = get_short_pull_request(pull_request)
         return pull_request
 
     def pull_request_filter(self, pull_request, files):
@@ -214,8 +573,11 @@ class ChangeChecker:
         :return None if change is not needed or dict with properties otherwise
         """
 
-        is_request_needed = is_comitter_the_org_member(pull_request, self.token) and \
-                            is_limited_number_of_commits(pull_request, self.token)
+        # Number of commits and author association are checked first,
+        # because they are taken from pull request json without requests to Github
+        is_request_needed = is_limited_number_of_commits(pull_request, self.token) and \
+                            (pull_request.get('author_association') in TRUSTED_AUTHOR_ASSOCIATIONS or
+                             is_comitter_the_org_member(pull_request, self.token))
         if is_request_needed:
             return self.default_properties
         return None
@@ -232,15 +594,22 @@ class ChangeChecker:
         Redefine __call__ to implement closure api
         First step is getting default properties for change. This needed to avoid specifying default
         properties in filters - just return self.default_properties
+        Makes blocking requests to Github, so patched GitPoller calls it in thread pool of reactor
 
         :return None if change is not needed or dict with properties otherwise
         """
         if branch.startswith('refs/pull/'):
+            # Only head branches of pull requests are checked (not refs/pull/*/merge)
+            if not PULL_REQUEST_BRANCH_RE.match(branch):
+                return None
             pull_request = self.get_pull_request(repository, branch)
+            if not pull_request:
+                return None
+            if pull_request['user']['login'] in self.ignored_authors:
+                print(f'Skip pull request of ignored author {pull_request["user"]["login"]}')
+                return None
             self.set_pull_request_default_properties(pull_request, files)
-            if pull_request:
-                return self.pull_request_filter(pull_request, files)
-            return None
+            return self.pull_request_filter(pull_request, files)
         self.set_commit_default_properties(repository, branch, revision, files, category)
         return self.commit_filter(repository, branch, revision, files, category)
 
@@ -250,6 +619,7 @@ def get_open_pull_request_branches(organization, repository, token):
     Create list of Github branches for open pull request
     Used to extend branches list for fetching in GitPoller
     Implemented as closure for specifying information about repository from buildbot configuration
+    Makes blocking request to Github, so patched GitPoller calls it in thread pool of reactor
     """
 
     def checker():
@@ -260,28 +630,36 @@ def get_open_pull_request_branches(organization, repository, token):
     return checker
 
 
+@functools.lru_cache(maxsize=4096)
 def is_release_branch(raw_branch):
-    # TODO: need to unify with MediaSdkDirectories.is_release_branch method
     """
     Checks if branch is release branch
     Used as branch filter for pollers
     """
-    # Ignore pull request branches like 'refs/pull/*'
-    if raw_branch.startswith('refs/heads/'):
-        branch = raw_branch[11:]
-        if MediaSdkDirectories.is_release_branch(branch) or branch == 'master':
-            return True
-
-    return False
+    return RELEASE_BRANCH_REF_RE.match(raw_branch) is not None
 
 
+@functools.lru_cache(maxsize=256)
 def get_repository_name_by_url(repo_url):
     """
     Gets repository name from GitHub url, by example
     https://github.com/Intel-Media-SDK/product-configs.git -> product-configs
     """
 
-    return repo_url.split('/')[-1][:-4]
+    repository = repo_url.rsplit('/', maxsplit=1)[-1]
+    if repository.endswith('.git'):
+        return repository[:-4]
+    return repository
+
+
+@functools.lru_cache(maxsize=256)
+def get_organization_and_repository_by_url(repo_url):
+    """
+    Gets organization and repository names from GitHub url, by example
+    https://github.com/Intel-Media-SDK/product-configs.git -> (Intel-Media-SDK, product-configs)
+    """
+
+    return GITHUB_REPOSITORY_URL_RE.search(repo_url).groups()
 
 
 class GithubCommitFilter:
@@ -289,7 +667,7 @@ class GithubCommitFilter:
     Class for encapsulating behavior of builder triggers
     """
     def __init__(self, repositories, branches):
-        self.repositories = repositories
+        self.repositories = frozenset(repositories)
         self.branches = branches
 
     def check_commit(self, step):
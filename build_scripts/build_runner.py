@@ -37,25 +37,115 @@ import collections
 import json
 import os
 import pathlib
-import platform
 import re
 import shutil
 import sys
+import tarfile
 import logging
-from collections import OrderedDict
-from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
-from build_scripts.common_runner import ConfigGenerator, Action, RunnerException
+from build_scripts.common_runner import ConfigGenerator, Action, RunnerException, SYSTEM_OS
 from common.helper import Stage, Product_type, Build_type, make_archive, \
-    copy_win_files, rotate_dir, cmd_exec, copytree, get_packing_cmd, ErrorCode, TargetArch, extract_archive, create_file
+    copy_win_files, rotate_dir, cmd_exec, copytree, get_packing_cmd, ErrorCode, TargetArch, extract_archive, create_file, \
+    copytree_data
 from common.logger_conf import configure_logger
 from common.git_worker import ProductState
 from common.build_number import get_build_number
 from common.manifest_manager import Manifest, get_build_dir, get_build_url
 
 
+EXECUTABLE_SUFFIXES = frozenset(['', '.so'])
+IO_THREADS = 16
+ELF_MAGIC = b'\x7fELF'
+VCXPROJ_RE = re.compile(r'"([^"]+\.vcxproj)"')
+MFX_VERSION_RE = re.compile(rb'MFX_VERSION_(MAJOR|MINOR)\s(\d+)')
+
+
+def _iter_executables(root_dir):
+    """
+    Find executable files and shared libraries in directory tree
+
+    :param root_dir: Path to directory
+    :type root_dir: pathlib.Path
+
+    :return: Generator of pathlib.Path
+    """
+
+    found_files = set()
+    dirs = [os.path.realpath(str(root_dir))]
+    while dirs:
+        with os.scandir(dirs.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.path)
+                elif entry.is_file() and os.path.splitext(entry.name)[1] in EXECUTABLE_SUFFIXES:
+                    # Versioned shared libraries (libmfx.so.1.28) are found by .so symlinks,
+                    # links are resolved to not return the same file twice
+                    real_path = os.path.realpath(entry.path) if entry.is_symlink() else entry.path
+                    if entry.stat().st_mode & 0o111 and real_path not in found_files:
+                        found_files.add(real_path)
+                        yield pathlib.Path(entry.path)
+
+
+def _is_elf(path):
+    """
+    Check that file is ELF binary by its magic number
+
+    :param path: Path to file
+    :type path: pathlib.Path
+
+    :return: Boolean
+    """
+
+    try:
+        with path.open('rb') as binary:
+            return binary.read(4) == ELF_MAGIC
+    except OSError:
+        return False
+
+
+def _link_or_copy(src, dst):
+    """
+    Create hard link to file or copy it if linking is not possible (e.g. another file system)
+
+    :param src: Path to source file
+    :type src: String
+
+    :param dst: Path to destination file
+    :type dst: String
+
+    :return: None | Exception
+    """
+
+    # Destination can be left by previous copying
+    if os.path.lexists(dst):
+        if os.path.samefile(src, dst):
+            return
+        os.unlink(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _remove_path(path):
+    """
+    Remove file or directory tree
+
+    :param path: Path to file or directory
+    :type path: pathlib.Path
+
+    :return: None | Exception
+    """
+
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path)
+    else:
+        path.unlink()
+
+
 class UnsupportedVSError(RunnerException):
     """
     Error, which need to be raised
@@ -127,6 +217,7 @@ class VsComponent(Action):
 
         self.solution_path = solution_path
         self.vs_version = vs_version
+        self._paths = self._vs_paths[vs_version]
         self.msbuild_args = msbuild_args
         self.dependencies = dependencies
 
@@ -138,24 +229,22 @@ class VsComponent(Action):
         """
 
         self.env['PATH'] = f'{os.environ["PATH"]};' \
-                           f'{self._vs_paths[self.vs_version]["ms_build"]};' \
-                           f'{self._vs_paths[self.vs_version]["vcvars"]}'
+                           f'{self._paths["ms_build"]};' \
+                           f'{self._paths["vcvars"]}'
 
         if self.vs_version == 'vs2005':
             # maxcpucount not supported in Visual Studio 2005
             if '/maxcpucount' in self.msbuild_args:
                 del self.msbuild_args['/maxcpucount']
 
-        ms_build = f'msbuild {self.solution_path}'
+        ms_build_parts = ['msbuild', str(self.solution_path)]
         for arg_name, data in self.msbuild_args.items():
             if isinstance(data, dict):
-                properties = []
-                for prop, value in data.items():
-                    properties.append('{}="{}"'.format(prop, value))
-                ms_build = f'{ms_build} {arg_name}:{";".join(properties)}'
-
+                properties = ';'.join(f'{prop}="{value}"' for prop, value in data.items())
+                ms_build_parts.append(f'{arg_name}:{properties}')
             else:
-                ms_build = f'{ms_build} {arg_name}:{data}'
+                ms_build_parts.append(f'{arg_name}:{data}')
+        ms_build = ' '.join(ms_build_parts)
 
         if self.vs_version == 'vs2017':
             self.cmd = ['call vcvars64.bat', ms_build]
@@ -171,33 +260,47 @@ class VsComponent(Action):
 
         sln_dir = self.solution_path.parent
 
-        with self.solution_path.open('r') as sln_file:
-            items = []
-            for line in sln_file:
-                for item in line.split(', '):
-                    if '.vcxproj' in item:
-                        items.append(item[1:-1])
-
-        for project in items:
-            project = pathlib.Path(project)
-            project_path = sln_dir / project
-            new_project_name = 'new_' + project.name
-            new_project_path = sln_dir / project.parent / new_project_name
-
-            if project_path.exists():
-                with new_project_path.open('w') as outfile:
-                    with project_path.open('r') as infile:
-                        lines = infile.readlines()
-                        for index, line in enumerate(lines):
-                            outfile.write(line)
-                            if line.startswith('    <ClCompile>') and 'MultiProcessorCompilation' \
-                                    not in lines[index + 1]:
-                                outfile.write(u'      '
-                                              u'<MultiProcessorCompilation>'
-                                              u'true'
-                                              u'</MultiProcessorCompilation>\n')
-                project_path.unlink()
-                new_project_path.rename(project_path)
+        items = VCXPROJ_RE.findall(self.solution_path.read_text(errors='replace'))
+
+        project_paths = [sln_dir / project for project in items]
+        if project_paths:
+            with ThreadPoolExecutor(max_workers=min(IO_THREADS, len(project_paths))) as executor:
+                # list() re-raises the first rewriting error
+                list(executor.map(self._enable_project_multi_processor_compilation,
+                                  project_paths))
+
+    @staticmethod
+    def _enable_project_multi_processor_compilation(project_path):
+        """
+        Set multiprocessor compilation for one project
+
+        :param project_path: Path to .vcxproj file
+        :type project_path: pathlib.Path
+
+        :return: None
+        """
+
+        new_project_path = project_path.parent / f'new_{project_path.name}'
+
+        if project_path.exists():
+            project_data = project_path.read_text()
+            # Project was already patched, e.g. by previous build in the same workspace
+            if project_data.count('<MultiProcessorCompilation>') >= \
+                    project_data.count('\n    <ClCompile>'):
+                return
+
+            # Rewrite from already read data and replace project atomically
+            with new_project_path.open('w') as outfile:
+                is_cl_compile = False
+                for line in project_data.splitlines(keepends=True):
+                    if is_cl_compile and 'MultiProcessorCompilation' not in line:
+                        outfile.write(u'      '
+                                      u'<MultiProcessorCompilation>'
+                                      u'true'
+                                      u'</MultiProcessorCompilation>\n')
+                    outfile.write(line)
+                    is_cl_compile = line.startswith('    <ClCompile>')
+            os.replace(str(new_project_path), str(project_path))
 
     def run(self, options=None):
         """
@@ -265,6 +368,7 @@ class BuildGenerator(ConfigGenerator):
         self._product_repos = []
         self._dev_pkg_data_to_archive = []
         self._install_pkg_data_to_archive = []
+        self._api_versions = {}
         self._custom_cli_args = custom_cli_args
         self._target_arch = target_arch
 
@@ -366,7 +470,9 @@ class BuildGenerator(ConfigGenerator):
         :return: None | Exception
         """
 
-        ms_arguments = deepcopy(self._config_variables.get('MSBUILD_ARGUMENTS', {}))
+        # VsComponent changes only top-level keys, so copying inner dicts is enough
+        ms_arguments = {key: dict(value) if isinstance(value, dict) else value
+                        for key, value in self._config_variables.get('MSBUILD_ARGUMENTS', {}).items()}
         if msbuild_args:
             for key, value in msbuild_args.items():
                 if isinstance(value, dict):
@@ -391,11 +497,20 @@ class BuildGenerator(ConfigGenerator):
 
         remove_dirs = {'BUILD_DIR', 'INSTALL_DIR', 'LOGS_DIR', 'PACK_DIR', 'DEPENDENCIES_DIR'}
 
+        dirs_to_remove = []
         for directory in remove_dirs:
             dir_path = self._options.get(directory)
             if dir_path.exists():
                 self._log.info(f'remove directory {dir_path}')
-                shutil.rmtree(dir_path)
+                dirs_to_remove.append(dir_path)
+
+        # Remove top-level subtrees of all directories in parallel
+        paths_to_remove = [path for dir_path in dirs_to_remove for path in dir_path.iterdir()]
+        with ThreadPoolExecutor(max_workers=IO_THREADS) as executor:
+            # list() re-raises the first removing error
+            list(executor.map(_remove_path, paths_to_remove))
+        for dir_path in dirs_to_remove:
+            dir_path.rmdir()
 
         self._options["LOGS_DIR"].mkdir(parents=True, exist_ok=True)
 
@@ -536,31 +651,38 @@ class BuildGenerator(ConfigGenerator):
         if not self._run_build_config_actions(Stage.PACK.value):
             no_errors = False
 
-        if platform.system() == 'Windows':
+        if SYSTEM_OS == 'Windows':
             extension = "zip"
-        elif platform.system() == 'Linux':
+        elif SYSTEM_OS == 'Linux':
             extension = "tar.gz"
         else:
-            self._log.critical(f'Can not pack data on this OS: {platform.system()}')
+            self._log.critical(f'Can not pack data on this OS: {SYSTEM_OS}')
             return False
 
+        archives = []
+
         # creating install package
         if self._install_pkg_data_to_archive:
-            if not make_archive(self._options["PACK_DIR"] / f"install_pkg.{extension}",
-                                self._install_pkg_data_to_archive):
-                no_errors = False
+            archives.append((self._options["PACK_DIR"] / f"install_pkg.{extension}",
+                             self._install_pkg_data_to_archive))
         else:
             self._log.info('Install package empty. Skip packing.')
 
         # creating developer package
         if self._dev_pkg_data_to_archive:
-            if not make_archive(self._options["PACK_DIR"] / f"developer_pkg.{extension}",
-                                self._dev_pkg_data_to_archive):
-                no_errors = False
+            archives.append((self._options["PACK_DIR"] / f"developer_pkg.{extension}",
+                             self._dev_pkg_data_to_archive))
         else:
             self._log.info('Developer package empty. Skip packing.')
 
-        # creating logs package
+        # Archives are independent and zlib releases GIL while compressing,
+        # so they are created in parallel
+        if archives:
+            with ThreadPoolExecutor(max_workers=len(archives)) as executor:
+                if not all(executor.map(lambda archive: make_archive(*archive), archives)):
+                    no_errors = False
+
+        # creating logs package (last, so it contains full log of packing)
         logs_data = [
             {
                 'from_path': self._options['ROOT_DIR'],
@@ -613,12 +735,7 @@ class BuildGenerator(ConfigGenerator):
         last_build_file = build_dir.parent.parent / f'last_build_{self._component.build_info.product_type}'
         is_latest_build = self._is_latest_revision(last_build_file)
 
-        # Workaround for copying to samba share on Linux
-        # to avoid exceptions while setting Linux permissions.
-        _orig_copystat = shutil.copystat
-        shutil.copystat = lambda x, y, follow_symlinks=True: x
-        shutil.copytree(self._options['PACK_DIR'], build_dir)
-        shutil.copystat = _orig_copystat
+        copytree_data(self._options['PACK_DIR'], build_dir, max_workers=IO_THREADS)
 
         if not self._run_build_config_actions(Stage.COPY.value):
             return False
@@ -653,6 +770,45 @@ class BuildGenerator(ConfigGenerator):
 
         return False
 
+    def _strip_binary(self, binary):
+        """
+        Strip one binary and save its debug information
+
+        :param binary: Path to binary
+        :type binary: pathlib.Path
+
+        :return: path to binary, Boolean
+        """
+
+        orig_file = str(binary.absolute())
+        debug_file = str((binary.parent / f'{binary.stem}.sym').absolute())
+        self._log.debug('-' * 80)
+        self._log.debug(f'Stripping {orig_file}')
+
+        strip_commands = [
+            # copy debug information
+            ['objcopy', '--only-keep-debug', orig_file, debug_file],
+            ['strip', '--strip-debug', '--strip-unneeded', '--remove-section=.comment', orig_file],
+            # add debug link
+            ['objcopy', f'--add-gnu-debuglink={debug_file}', orig_file]
+        ]
+
+        is_stripped = True
+        for command in strip_commands:
+            err, out = cmd_exec(command, shell=False, log=self._log, verbose=False)
+            if err:
+                is_stripped = False
+                self._log.error(out)
+
+        # chmod -x without spawning one more process per binary
+        try:
+            os.chmod(debug_file, os.stat(debug_file).st_mode & ~0o111)
+        except OSError as error:
+            is_stripped = False
+            self._log.error(error)
+
+        return orig_file, is_stripped
+
     def _strip_bins(self):
         """
         Strip binaries and save debug information
@@ -663,68 +819,26 @@ class BuildGenerator(ConfigGenerator):
         self._log.info('-' * 80)
         self._log.info(f'Stripping binaries')
 
-        system_os = platform.system()
-
-        if system_os == 'Linux':
-            bins_to_strip = []
+        if SYSTEM_OS == 'Linux':
+            # Not strip files if they are not binaries (scripts etc.)
+            bins_to_strip = [path for path in _iter_executables(self._options['BUILD_DIR'])
+                             if _is_elf(path)]
             binaries_with_error = []
-            executable_bin_filter = ['', '.so']
-            search_results = self._options['BUILD_DIR'].rglob('*')
-
-            for path in search_results:
-                if path.is_file():
-                    if os.access(path, os.X_OK) and path.suffix in executable_bin_filter:
-                        bins_to_strip.append(path)
-
-            for result in bins_to_strip:
-                orig_file = str(result.absolute())
-                debug_file = str((result.parent / f'{result.stem}.sym').absolute())
-                self._log.debug('-' * 80)
-                self._log.debug(f'Stripping {orig_file}')
-
-                strip_commands = OrderedDict([
-                    ('copy_debug', ['objcopy',
-                                    '--only-keep-debug',
-                                    orig_file,
-                                    debug_file]),
-                    ('strip', ['strip',
-                               '--strip-debug',
-                               '--strip-unneeded',
-                               '--remove-section=.comment',
-                               orig_file]),
-                    ('add_debug_link', ['objcopy',
-                                        f'--add-gnu-debuglink={debug_file}',
-                                        orig_file]),
-                    ('set_chmod', ['chmod',
-                                   '-x',
-                                   debug_file])
-                ])
-
-                check_binary_command = f'file {orig_file} | grep ELF'
-
-                for command in strip_commands.values():
-                    err, out = cmd_exec(command, shell=False, log=self._log, verbose=False)
-                    if err:
-                        # Not strip file if it is not binary
-                        return_code, _ = cmd_exec(check_binary_command, shell=True, log=self._log,
-                                                  verbose=False)
-                        if return_code:
-                            self._log.warning(f"File {orig_file} is not binary")
-                            break
-                        if orig_file not in binaries_with_error:
-                            binaries_with_error.append(orig_file)
-                        self._log.error(out)
-                        continue
+
+            with ThreadPoolExecutor(max_workers=self._options['CPU_CORES']) as executor:
+                for orig_file, is_stripped in executor.map(self._strip_binary, bins_to_strip):
+                    if not is_stripped:
+                        binaries_with_error.append(orig_file)
 
             if binaries_with_error:
                 self._log.error('Stripping for next binaries was failed. '
                                 'See full log for details:\n%s',
                                 '\n'.join(binaries_with_error))
                 return False
-        elif system_os == 'Windows':
+        elif SYSTEM_OS == 'Windows':
             pass
         else:
-            self._log.error(f'Can not strip binaries on {system_os}')
+            self._log.error(f'Can not strip binaries on {SYSTEM_OS}')
             return False
 
         return True
@@ -747,27 +861,37 @@ class BuildGenerator(ConfigGenerator):
 
         mfxdefs_path = self._options['REPOS_DIR'] / repo_name / 'include' / header_name
         if mfxdefs_path.exists():
+            # Header is scanned again only if it was changed
+            header_stat = mfxdefs_path.stat()
+            cache_key = (mfxdefs_path, header_stat.st_mtime_ns, header_stat.st_size)
+            if cache_key in self._api_versions:
+                return self._api_versions[cache_key]
+
             is_major_version_found = False
             is_minor_version_found = False
 
-            with open(mfxdefs_path, 'r') as lines:
-                for line in lines:
-                    major_version_pattern = re.search(r'MFX_VERSION_MAJOR\s(\d+)', line)
-                    if major_version_pattern:
-                        major_version = major_version_pattern.group(1)
-                        is_major_version_found = True
-                        continue
-
-                    minor_version_pattern = re.search(r'MFX_VERSION_MINOR\s(\d+)', line)
-                    if minor_version_pattern:
-                        minor_version = minor_version_pattern.group(1)
-                        is_minor_version_found = True
+            # Header is small, so it is read at once and scanned by one regex
+            header_data = mfxdefs_path.read_bytes()
+            for version_match in MFX_VERSION_RE.finditer(header_data):
+                version_type, version = version_match.groups()
+                if version_type == b'MAJOR' and not is_major_version_found:
+                    major_version = version.decode()
+                    is_major_version_found = True
+                elif version_type == b'MINOR' and not is_minor_version_found:
+                    minor_version = version.decode()
+                    is_minor_version_found = True
+
+                # Do not scan the rest of the header
+                if is_major_version_found and is_minor_version_found:
+                    break
 
             if not is_major_version_found:
                 self._log.warning(f'MFX_VERSION_MAJOR does not exist')
 
             if not is_minor_version_found:
                 self._log.warning(f'MFX_VERSION_MINOR does not exist')
+
+            self._api_versions[cache_key] = major_version, minor_version
         else:
             self._log.warning(f'{header_name} does not exist')
 
@@ -793,29 +917,37 @@ class BuildGenerator(ConfigGenerator):
         # Create new dir for pkgconfigs
         if copy_to:
             try:
-                copytree(pkgconfig_dir, copy_to)
+                # pkgconfigs are not changed in place below, so hard links are enough
+                copytree(pkgconfig_dir, copy_to, copy_function=_link_or_copy)
                 pkgconfig_dir = copy_to
                 self._log.debug(f"update_config: pkgconfigs were copied from {pkgconfig_dir} to {copy_to}")
             except OSError:
                 self._log.error(f"update_config: Failed to copy package configs from {pkgconfig_dir} to {copy_to}")
                 raise
 
-        files_list = pkgconfig_dir.glob(pattern)
+        update_patterns = [(re.compile(update_pattern), data)
+                           for update_pattern, data in update_data.items()]
+
+        files_list = sorted(pkgconfig_dir.glob(pattern))
         for pkgconfig in files_list:
-            with pkgconfig.open('r+') as conf_file:
-                self._log.debug(f"update_config: Start updating {pkgconfig}")
-                try:
-                    current_config_data = conf_file.readlines()
-                    conf_file.seek(0)
-                    conf_file.truncate()
-                    for line in current_config_data:
-                        for pattern, data in update_data.items():
-                            line = re.sub(pattern, data, line)
-                        conf_file.write(line)
-                    self._log.debug(f"update_config: {pkgconfig} is updated")
-                except OSError:
-                    self._log.error(f"update_config: Failed to update package config: {pkgconfig}")
-                    raise
+            self._log.debug(f"update_config: Start updating {pkgconfig}")
+            try:
+                updated_config_data = []
+                with pkgconfig.open('r') as conf_file:
+                    for line in conf_file:
+                        for update_pattern, data in update_patterns:
+                            line = update_pattern.sub(data, line)
+                        updated_config_data.append(line)
+
+                # Replace file instead of rewriting it to break hard link to original pkgconfig
+                updated_pkgconfig = pkgconfig.with_name(f'{pkgconfig.name}.new')
+                updated_pkgconfig.write_text(''.join(updated_config_data))
+                shutil.copymode(str(pkgconfig), str(updated_pkgconfig))
+                os.replace(str(updated_pkgconfig), str(pkgconfig))
+                self._log.debug(f"update_config: {pkgconfig} is updated")
+            except OSError:
+                self._log.error(f"update_config: Failed to update package config: {pkgconfig}")
+                raise
 
     def _get_dependencies(self):
         deps = self._config_variables.get("DEPENDENCIES", {})
@@ -829,29 +961,51 @@ class BuildGenerator(ConfigGenerator):
 
             self._log.info(f'Creating manifest')
 
+            packages_to_extract = []
             for dependency in deps:
                 self._log.info(f'Getting component {dependency}')
                 comp = self._manifest.get_component(dependency)
                 if comp:
-                    try:
-                        dep_dir = get_build_dir(self._manifest, dependency)
-                        # TODO: Extension hardcoded for open source. Need to use only .zip in future.
-                        dep_pkg = dep_dir / f'install_pkg.tar.gz'
-
-                        self._log.info(f'Extracting {dep_pkg}')
-                        extract_archive(dep_pkg, deps_dir / dependency)
-                    except Exception:
-                        self._log.exception('Can not extract archive')
+                    dep_dir = get_build_dir(self._manifest, dependency)
+                    # TODO: Extension hardcoded for open source. Need to use only .zip in future.
+                    dep_pkg = dep_dir / f'install_pkg.tar.gz'
+                    if not dep_pkg.is_file():
+                        self._log.error(f'Package {dep_pkg} of component {dependency} does not exist')
                         return False
+                    packages_to_extract.append((dep_pkg, deps_dir / dependency))
                 else:
                     self._log.error(f'Component {dependency} does not exist in manifest')
                     return False
+
+            # Archives are extracted to different directories, so it can be done in parallel
+            with ThreadPoolExecutor(max_workers=min(IO_THREADS, len(packages_to_extract))) as executor:
+                if not all(executor.map(self._extract_dependency, packages_to_extract)):
+                    return False
         except Exception:
             self._log.exception('Exception occurred:')
             return False
 
         return True
 
+    def _extract_dependency(self, package):
+        """
+        Extract package of dependency
+
+        :param package: Path to package, path to extract
+        :type package: Tuple
+
+        :return: Boolean
+        """
+
+        dep_pkg, extract_to = package
+        self._log.info(f'Extracting {dep_pkg}')
+        try:
+            extract_archive(dep_pkg, extract_to)
+        except (tarfile.TarError, OSError):
+            self._log.exception('Can not extract archive')
+            return False
+        return True
+
 
 def main():
     """
@@ -895,14 +1049,13 @@ def main():
     target_arch = list(set(parsed_args.target_arch))
 
     custom_cli_args = {}
-    if unknown_args:
-        for arg in unknown_args:
-            try:
-                arg = arg.split('=')
-                custom_cli_args[arg[0]] = arg[1]
-            except Exception:
-                log.exception(f'Wrong argument layout: {arg}')
-                exit(ErrorCode.CRITICAL)
+    for arg in unknown_args:
+        # Value can contain '=', so split by the first one only
+        name, separator, value = arg.partition('=')
+        if not separator:
+            log.error(f'Wrong argument layout: {arg}')
+            exit(ErrorCode.CRITICAL)
+        custom_cli_args[name] = value
 
     try:
         build_config = BuildGenerator(
@@ -26,11 +26,20 @@ import logging
 import os
 import pathlib
 import platform
-import multiprocessing
 from collections import defaultdict
 
 from common.helper import cmd_exec, ErrorCode
 from common.mediasdk_directories import Proxy
+from common.system_info import get_cpu_count
+
+
+SYSTEM_OS = platform.system()
+
+# Substrings of compiler and linker errors in build output
+ERROR_SUBSTRINGS = {
+    'Windows': (' error ',),
+    'Linux': (': error', 'error:'),
+}.get(SYSTEM_OS)
 
 
 class RunnerException(Exception):
@@ -156,18 +165,11 @@ class Action(object):
         # ...decode.cpp(92): error C2220: warning treated as error - no 'executable' file ...
         # LINK : fatal error LNK1257: code generation failed ...
 
-        if platform.system() == 'Windows':
-            error_substrings = [' error ']
-        elif platform.system() == 'Linux':
-            error_substrings = [': error', 'error:']
+        if not ERROR_SUBSTRINGS:
+            self.log.warning(f'Unsupported OS for parsing errors: {SYSTEM_OS}')
         else:
-            error_substrings = None
-            self.log.warning(f'Unsupported OS for parsing errors: {platform.system()}')
-
-        if error_substrings:
-            for line in stdout.splitlines():
-                if any(error_substring in line for error_substring in error_substrings):
-                    output.append(line)
+            output.extend(line for line in stdout.splitlines()
+                          if any(substring in line for substring in ERROR_SUBSTRINGS))
             if len(output) > 1:
                 output.append("The errors above were found in the output. "
                               "See full log for details.")
@@ -184,7 +186,7 @@ class ConfigGenerator:
         self._options = {
             "ROOT_DIR": pathlib.Path(root_dir).absolute(),
             "LOGS_DIR": root_dir / 'logs',
-            "CPU_CORES": multiprocessing.cpu_count(),  # count of logical CPU cores
+            "CPU_CORES": get_cpu_count(),  # count of logical CPU cores
             "VARS": {},  # Dictionary of dynamical variables for action() steps
             "ENV": {},  # Dictionary of dynamical environment variables
         }
@@ -250,10 +252,9 @@ class ConfigGenerator:
         :type stage: Stage
         """
 
-        stage_value = f'_{stage}'
-
-        if hasattr(self, stage_value):
-            return self.__getattribute__(stage_value)()
+        stage_method = getattr(self, f'_{stage}', None)
+        if stage_method:
+            return stage_method()
 
         self._log.error(f'Stage {stage} is not supported')
         return False
@@ -168,6 +168,10 @@ class ManifestRunner:
 
         self._log.info('Updating manifest')
 
+        # The same repository can be used by several components,
+        # but commit time has to be read from git only once
+        commit_times = {}
+
         for component in self._manifest.components:
             for repo in component.repositories:
                 if repo.name == self._repo:
@@ -176,14 +180,18 @@ class ManifestRunner:
                     self._manifest.set_event_component(component.name)
                     self._manifest.set_event_repo(repo.name)
 
-                if repo.name in self._updated_repos:
+                state = self._updated_repos.get(repo.name)
+                if state:
+                    if state.repo_name not in commit_times:
+                        commit_times[state.repo_name] = \
+                            str(state.repo.commit().committed_datetime.astimezone())
                     upd_repo = Repository(
-                        self._updated_repos[repo.name].repo_name,
-                        self._updated_repos[repo.name].url,
-                        self._updated_repos[repo.name].branch_name,
-                        self._updated_repos[repo.name].target_branch,
-                        self._updated_repos[repo.name].commit_id,
-                        str(self._updated_repos[repo.name].repo.commit().committed_datetime.astimezone())
+                        state.repo_name,
+                        state.url,
+                        state.branch_name,
+                        state.target_branch,
+                        state.commit_id,
+                        commit_times[state.repo_name]
                     )
                     component.add_repository(upd_repo, replace=True)
 
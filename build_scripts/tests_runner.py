@@ -35,7 +35,7 @@ import os
 sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
 from build_scripts.common_runner import ConfigGenerator, RunnerException
 from test_scripts.components_installer import install_components
-from common.helper import TestStage, ErrorCode, Product_type, Build_type, rotate_dir
+from common.helper import TestStage, ErrorCode, Product_type, Build_type, rotate_dir, copytree_data
 from common.logger_conf import configure_logger
 from common.git_worker import ProductState
 from common.manifest_manager import Manifest, get_test_dir, get_test_url
@@ -209,18 +209,13 @@ class TestRunner(ConfigGenerator):
         rotate_dir(artifacts_dir)
 
         if self._artifacts_layout:
-            _orig_copystat = shutil.copystat
-            shutil.copystat = lambda x, y, follow_symlinks=True: x
-
             for local_path, share_dir in self._artifacts_layout.items():
                 local_path = pathlib.Path(local_path).resolve()
                 if local_path.is_dir():
-                    shutil.copytree(local_path, artifacts_dir / share_dir, ignore=shutil.ignore_patterns('bin'))
+                    copytree_data(local_path, artifacts_dir / share_dir, ignore=shutil.ignore_patterns('bin'))
                 elif local_path.is_file():
                     shutil.copyfile(local_path, artifacts_dir / share_dir)
 
-            shutil.copystat = _orig_copystat
-
             self._log.info(f'Artifacts copied to: {artifacts_dir}')
             self._log.info(f'Artifacts available by link: {artifacts_url}')
         else:
@@ -27,6 +27,7 @@ import pathlib
 import shutil
 import stat
 import tarfile
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from shutil import copystat, Error, copy2
 from zipfile import ZipFile, ZIP_DEFLATED
@@ -233,10 +234,19 @@ def make_archive(path, data_to_archive):
     log.info('-' * 50)
     log.info('create archive %s', path)
 
+    compressor = None
     if path.suffix == '.tar':
         pkg = tarfile.open(path, "w")
     elif path.suffix == '.gz':
-        pkg = tarfile.open(path, "w:gz", compresslevel=6)
+        pigz = shutil.which('pigz')
+        if pigz:
+            # pigz compresses on all cores, tar stream is written to its stdin
+            with path.open('wb') as archive_file:
+                compressor = subprocess.Popen([pigz, '-6'], stdin=subprocess.PIPE,
+                                              stdout=archive_file)
+            pkg = tarfile.open(fileobj=compressor.stdin, mode="w|")
+        else:
+            pkg = tarfile.open(path, "w:gz", compresslevel=6)
     elif path.suffix == '.bz2':
         pkg = tarfile.open(path, "w:bz2")
     elif path.suffix == '.zip':
@@ -260,7 +270,18 @@ def make_archive(path, data_to_archive):
                 log.exception("Can not pack results")
                 no_errors = False
 
-    pkg.close()
+    try:
+        pkg.close()
+    except:
+        log.exception("Can not pack results")
+        no_errors = False
+
+    if compressor:
+        # Closes stdin of pigz (even if it exited early) and waits for it
+        compressor.communicate()
+        if compressor.returncode:
+            log.error("pigz failed with code %s", compressor.returncode)
+            no_errors = False
 
     return no_errors
 
@@ -310,35 +331,27 @@ def extract_archive(archive_path, extract_to, exclude=None):
     archive_path = pathlib.Path(archive_path)
     extract_to = pathlib.Path(extract_to)
 
+    # Tar archives are opened as streams to decompress them in one pass
     if archive_path.suffix == '.tar':
-        package = tarfile.open(str(archive_path), 'r')
+        package = tarfile.open(str(archive_path), 'r|')
     elif archive_path.suffix == '.gz':
-        package = tarfile.open(str(archive_path), 'r:gz')
+        package = tarfile.open(str(archive_path), 'r|gz')
     elif archive_path.suffix == '.zip' or archive_path.suffix == '.appx':
         package = ZipFile(str(archive_path))
     else:
         raise UnsupportedArchiveError(
             f"Unsupported archive extension {archive_path.suffix}")
 
-    if isinstance(package, ZipFile):
-        package_data = package.infolist()
-        is_zip = True
-    else:
-        package_data = package.getmembers()
-        is_zip = False
+    is_zip = isinstance(package, ZipFile)
+
+    def is_excluded(member):
+        member_path = member.filename if is_zip else member.name
+        return any(pattern in member_path for pattern in exclude)
 
     data_to_extract = None
     if exclude and isinstance(exclude, list):
-        data_to_extract = []
-        for member in package_data:
-            is_excluded = False
-            for pattern in exclude:
-                member_path = member.filename if is_zip else member.name
-                if pattern in member_path:
-                    is_excluded = True
-                    break
-            if not is_excluded:
-                data_to_extract.append(member)
+        package_data = package.infolist() if is_zip else package
+        data_to_extract = (member for member in package_data if not is_excluded(member))
 
     package.extractall(extract_to, members=data_to_extract)
     package.close()
@@ -437,6 +450,47 @@ def copytree(src, dst, symlinks=False, ignore=None, copy_function=copy2,
     return dst
 
 
+def copytree_data(src, dst, ignore=None, max_workers=16):
+    """
+    Copy data of files from directory tree using several threads
+    Metadata is not copied, so it is safe for copying to samba share
+    where setting Linux permissions fails.
+
+    :param src: Path to source directory
+    :type src: String|pathlib.Path
+
+    :param dst: Path to destination directory
+    :type dst: String|pathlib.Path
+
+    :param ignore: callable like in copytree: callable(src, names) -> ignored_names
+    :type ignore: Function
+
+    :param max_workers: Count of copying threads
+    :type max_workers: Integer
+
+    :return: None | Exception
+    """
+
+    src = pathlib.Path(src)
+    dst = pathlib.Path(dst)
+
+    files_to_copy = []
+    for root, dirs, files in os.walk(src, followlinks=True):
+        if ignore is not None:
+            ignored_names = ignore(root, dirs + files)
+            dirs[:] = [name for name in dirs if name not in ignored_names]
+            files = [name for name in files if name not in ignored_names]
+
+        dst_root = dst / pathlib.Path(root).relative_to(src)
+        dst_root.mkdir(parents=True, exist_ok=True)
+        for file_name in files:
+            files_to_copy.append((os.path.join(root, file_name), dst_root / file_name))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # list() re-raises the first copying error
+        list(executor.map(lambda paths: shutil.copyfile(*paths), files_to_copy))
+
+
 # TODO refactor hard code
 def copy_win_files(repos_dir, build_dir):
     """
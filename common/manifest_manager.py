@@ -35,6 +35,10 @@ except Exception:
     except Exception:
         import common.static_public_data as static_data
 
+# Use libyaml bindings if PyYAML was built with them, they are much faster
+YAML_LOADER = getattr(yaml, 'CFullLoader', yaml.FullLoader)
+YAML_DUMPER = getattr(yaml, 'CDumper', yaml.Dumper)
+
 
 class ManifestException(Exception):
     pass
@@ -89,7 +93,7 @@ class Manifest:
 
         if self._manifest_file.is_file():
             with self._manifest_file.open('r') as manifest:
-                manifest_info = yaml.load(manifest, Loader=yaml.FullLoader)
+                manifest_info = yaml.load(manifest, Loader=YAML_LOADER)
 
             self._version = manifest_info.get('version', '0')
             self._event_component = manifest_info['event']['component']
@@ -235,7 +239,7 @@ class Manifest:
 
         try:
             with path_to_save.open('w') as manifest:
-                yaml.dump(manifest_data, stream=manifest,
+                yaml.dump(manifest_data, stream=manifest, Dumper=YAML_DUMPER,
                           default_flow_style=False, sort_keys=False)
         except Exception as ex:
             raise ManifestSavingError(ex)
@@ -23,9 +23,12 @@ Information about system
 
 """
 
+import os
 import platform
+import pathlib
 import distro
 from enum import Enum
+from functools import lru_cache
 
 
 class UnsupportedOsError(Exception):
@@ -89,3 +92,31 @@ def get_os_version():
     if os_type_is_linux():
         return distro.major_version(), distro.minor_version()
     raise UnsupportedOsError(f'The platform is not Linux')
+
+
+@lru_cache(maxsize=None)
+def get_cpu_count():
+    """
+    Return count of logical CPU cores available for the process
+    It takes into account CPU affinity and cgroups v2 CPU quota (containers)
+
+    :return: count of CPU cores
+    :rtype: Integer
+    """
+
+    try:
+        cpu_count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        # os.sched_getaffinity is not available on Windows
+        cpu_count = os.cpu_count() or 1
+
+    cpu_max = pathlib.Path('/sys/fs/cgroup/cpu.max')
+    if cpu_max.exists():
+        try:
+            quota, period = cpu_max.read_text().split()
+            if quota != 'max':
+                cpu_count = min(cpu_count, max(1, int(quota) // int(period)))
+        except (OSError, ValueError):
+            pass
+
+    return cpu_count